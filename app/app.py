@@ -24,6 +24,7 @@ DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__
 STATION_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'raw', 'station_data')
 
 engine = None
+station_files = None
 
 def get_engine():
     global engine
@@ -37,6 +38,17 @@ def get_engine():
     return engine
 
 
+def get_station_files():
+    """Names of the raw station CSVs on disk, scanned once on first use."""
+    global station_files
+    if station_files is None:
+        station_files = set()
+        if os.path.isdir(STATION_DATA_DIR):
+            with os.scandir(STATION_DATA_DIR) as entries:
+                station_files = {e.name for e in entries if e.is_file()}
+    return station_files
+
+
 
 @app.route('/')
 def serve_dashboard():
@@ -122,7 +134,9 @@ def calculate_attribution():
                 """Try multiple possible column names, return float or None."""
                 for c in candidates:
                     if c in row and pd.notna(row[c]):
-                        return float(row[c])
+                        # Station wind is stored as float32; rounding drops the
+                        # widening noise (4.8 -> 4.800000190734863) from responses
+                        return round(float(row[c]), 2)
                 return None
 
             wind_dir = safe_get(wind_row, "wind_dir_10m", "wind_direction_10m", "wind_dir")
@@ -226,37 +240,66 @@ def calculate_modulated_attribution_endpoint():
     if not data:
         return jsonify({'error': 'No JSON data provided'}), 400
     
-    timestamp_str = data.get('timestamp')
-    readings = data.get('readings', {})
-    wind_dir = data.get('wind_dir')
-    wind_speed = data.get('wind_speed')
-    blh = data.get('blh')
-    fire_count = data.get('fire_count', 0)
-    
-    if not timestamp_str:
+    if not data.get('timestamp'):
         return jsonify({'error': 'timestamp is required'}), 400
     
     try:
-        from datetime import datetime as dt
-        timestamp = pd.to_datetime(timestamp_str).to_pydatetime()
-        
-        result = calculate_modulated_attribution(
-            timestamp=timestamp,
-            readings=readings,
-            wind_dir=wind_dir,
-            wind_speed=wind_speed,
-            blh=blh,
-            fire_count=fire_count
-        )
-        
-        # Convert any numpy types
-        result = json.loads(json.dumps(result, default=str))
-        
-        return jsonify(result)
+        return jsonify(run_modulated_attribution(data))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/attribution/modulated/batch', methods=['POST'])
+def calculate_modulated_attribution_batch():
+    """
+    Calculate modulated attribution for several inputs in one request.
+    
+    Request body:
+    {
+        "cases": [{<same body as /attribution/modulated>}, ...]
+    }
+    
+    Returns {"count": N, "results": [...]} in request order. A case that
+    fails gets {"error": "..."} in its slot instead of failing the batch.
+    """
+    data = request.get_json()
+    
+    if not isinstance(data, dict) or not isinstance(data.get('cases'), list):
+        return jsonify({'error': 'cases list is required'}), 400
+    
+    results = []
+    for case in data['cases']:
+        if not isinstance(case, dict) or not case.get('timestamp'):
+            results.append({'error': 'timestamp is required'})
+            continue
+        try:
+            results.append(run_modulated_attribution(case))
+        except Exception as e:
+            results.append({'error': str(e)})
+    
+    return jsonify({
+        'count': len(results),
+        'results': results
+    })
+
+
+def run_modulated_attribution(data):
+    """Run the modulation engine for one request body (timestamp already checked)."""
+    timestamp = pd.to_datetime(data['timestamp']).to_pydatetime()
+    
+    result = calculate_modulated_attribution(
+        timestamp=timestamp,
+        readings=data.get('readings', {}),
+        wind_dir=data.get('wind_dir'),
+        wind_speed=data.get('wind_speed'),
+        blh=data.get('blh'),
+        fire_count=data.get('fire_count', 0)
+    )
+    
+    # Convert any numpy types
+    return json.loads(json.dumps(result, default=str))
+
+
 @app.route('/station/<station_id>/data', methods=['GET'])
 def get_station_data(station_id):
     """
@@ -272,11 +315,12 @@ def get_station_data(station_id):
     
     station = station.iloc[0]
     filename = station['filename']
-    filepath = os.path.join(STATION_DATA_DIR, filename)
     
-    if not os.path.exists(filepath):
+    if filename not in get_station_files():
         return jsonify({'error': f'Data file not found for station {station_id}'}), 404
     
+    filepath = os.path.join(STATION_DATA_DIR, filename)
+    
     try:
         df = pd.read_csv(filepath)
         
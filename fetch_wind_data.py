@@ -5,31 +5,93 @@ Fetches wind data for all CPCB stations for the date range matching
 existing wind data (Feb 18 - Dec 02, 2025).
 """
 
+import numpy as np
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import math
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 import os
+import shutil
 
 # OpenMeteo Historical Archive API
 ARCHIVE_API = "https://archive-api.open-meteo.com/v1/archive"
 
-# Variables to fetch (matching existing wind data structure)
-HOURLY_VARS = [
-    "temperature_2m",
-    "wind_speed_10m",
-    "wind_direction_10m",
-    "wind_speed_80m",
-    "wind_direction_80m",
-    "boundary_layer_height"
-]
+# Variables to fetch -> stored column name (matching existing wind data structure)
+HOURLY_VARS = {
+    "temperature_2m": "wind_temp",
+    "wind_speed_10m": "wind_speed_10m",
+    "wind_direction_10m": "wind_dir_10m",
+    "wind_speed_80m": "wind_speed_80m",
+    "wind_direction_80m": "wind_dir_80m",
+    "boundary_layer_height": "blh"
+}
 
 # Date range (matching existing data)
 START_DATE = "2025-02-18"
 END_DATE = "2025-12-02"
 
+# Concurrent requests in flight - keep small, this is a free API
+MAX_WORKERS = 8
+
+# OpenMeteo's free tier allows 600 API calls per minute, but bills a request
+# as several calls: one per 14 days of data and per 10 variables. Budget a
+# fraction of the quota (override with OPENMETEO_CALLS_PER_MINUTE) and derive
+# the request rate across all workers from each request's weighted cost.
+# A full run (~57 stations x 21 calls) also fits the 5000/hour and
+# 10000/day limits, though not several back-to-back runs in one hour.
+CALLS_PER_MINUTE = float(os.environ.get("OPENMETEO_CALLS_PER_MINUTE", 400))
+
+
+def request_cost(start_date, end_date, n_vars):
+    """Number of API calls OpenMeteo counts for one location's request."""
+    days = (datetime.fromisoformat(end_date) - datetime.fromisoformat(start_date)).days + 1
+    return math.ceil(days / 14) * math.ceil(n_vars / 10)
+
+
+REQUEST_COST = request_cost(START_DATE, END_DATE, len(HOURLY_VARS))
+MAX_REQUESTS_PER_SECOND = CALLS_PER_MINUTE / 60 / REQUEST_COST
+
+# Shared session: keep-alive connections are reused across stations/workers
+# instead of paying a new TCP+TLS handshake per request
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504]),
+))
+
+
+class RateLimiter:
+    """Thread-safe limiter that spaces calls evenly, shared by all workers."""
+    
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self._lock = threading.Lock()
+        self._next_slot = time.monotonic()
+    
+    def wait(self):
+        """Block until the caller's slot comes up."""
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+LIMITER = RateLimiter(MAX_REQUESTS_PER_SECOND)
+
+
 def fetch_station_wind(station_id, name, lat, lon):
-    """Fetch historical wind data for a single station."""
+    """Fetch historical wind data for a single station.
+
+    Returns a (station_id, DataFrame) tuple; the DataFrame is None on failure.
+    """
     params = {
         "latitude": lat,
         "longitude": lon,
@@ -40,35 +102,34 @@ def fetch_station_wind(station_id, name, lat, lon):
     }
     
     try:
-        response = requests.get(ARCHIVE_API, params=params, timeout=60)
+        LIMITER.wait()
+        response = SESSION.get(ARCHIVE_API, params=params, timeout=60)
         response.raise_for_status()
         data = response.json()
         
         if "hourly" not in data:
             print(f"  ⚠️ No hourly data for {name}")
-            return None
+            return station_id, None
         
-        # Create DataFrame
+        # Create DataFrame from typed arrays so pandas skips dtype inference.
+        # Station name/lat/lon are constant per station and already live in
+        # stations_metadata.csv, so they are not repeated on every hourly row.
         hourly = data["hourly"]
-        df = pd.DataFrame({
-            "timestamp": pd.to_datetime(hourly["time"]),
-            "station_id": station_id,
-            "station_name": name,
-            "lat": lat,
-            "lon": lon,
-            "wind_temp": hourly.get("temperature_2m"),
-            "wind_speed_10m": hourly.get("wind_speed_10m"),
-            "wind_dir_10m": hourly.get("wind_direction_10m"),
-            "wind_speed_80m": hourly.get("wind_speed_80m"),
-            "wind_dir_80m": hourly.get("wind_direction_80m"),
-            "blh": hourly.get("boundary_layer_height")
-        })
+        n_hours = len(hourly["time"])
+        columns = {
+            "timestamp": pd.to_datetime(hourly["time"], format="%Y-%m-%dT%H:%M"),
+            "station_id": np.full(n_hours, station_id, dtype=np.int32),
+        }
+        for var, column in HOURLY_VARS.items():
+            # None (missing hours) becomes NaN
+            columns[column] = np.asarray(hourly.get(var, [None] * n_hours), dtype=np.float32)
+        df = pd.DataFrame(columns)
         
-        return df
+        return station_id, df
         
     except requests.RequestException as e:
         print(f"  ❌ Error fetching {name}: {e}")
-        return None
+        return station_id, None
 
 
 def main():
@@ -79,43 +140,119 @@ def main():
     
     print(f"📡 Fetching wind data for {len(stations)} stations")
     print(f"📅 Date range: {START_DATE} to {END_DATE}")
+    print(f"⏱️ Rate: {MAX_REQUESTS_PER_SECOND * 60:.1f} requests/min "
+          f"({REQUEST_COST} API calls each, budget {CALLS_PER_MINUTE:.0f} calls/min)")
     print("=" * 50)
     
-    all_data = []
+    # Parquet store: one file per station, so each station is written as it
+    # arrives and the full history is never held in memory. The run writes
+    # into a staging directory that only replaces the live store once the run
+    # completes, so readers never see an empty or partial store.
+    output_dir = os.path.join(script_dir, "data", "cleaned", "wind_stations")
+    staging_dir = output_dir + ".staging"
+    shutil.rmtree(staging_dir, ignore_errors=True)  # left over from an interrupted run
+    os.makedirs(staging_dir)
     
-    for i, row in stations.iterrows():
-        station_id = row["station_id"]
-        name = row["station_name"]
-        lat = row["lat"]
-        lon = row["lon"]
-        
-        print(f"[{i+1}/{len(stations)}] Fetching {name}...", end=" ", flush=True)
-        
-        df = fetch_station_wind(station_id, name, lat, lon)
-        
-        if df is not None:
-            all_data.append(df)
-            print(f"✅ {len(df)} hours")
-        else:
-            print("⏭️ skipped")
-        
-        # Rate limiting - be nice to free API
-        time.sleep(0.5)
+    total_records = 0
+    stations_saved = 0
+    min_ts = max_ts = None
     
-    if all_data:
-        # Combine all station data
-        combined = pd.concat(all_data, ignore_index=True)
-        
-        # Save to CSV
-        output_path = os.path.join(script_dir, "data", "cleaned", "wind_stations.csv")
-        combined.to_csv(output_path, index=False)
+    # Requests are network-bound, so fan them out over a small thread pool
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        futures = {
+            pool.submit(fetch_station_wind, station_id, name, lat, lon): name
+            for station_id, name, lat, lon in zip(
+                stations["station_id"].tolist(),
+                stations["station_name"].tolist(),
+                stations["lat"].tolist(),
+                stations["lon"].tolist(),
+            )
+        }
         
+        for i, future in enumerate(as_completed(futures)):
+            name = futures[future]
+            station_id, df = future.result()
+            
+            if df is not None:
+                write_station(df, os.path.join(staging_dir, f"{station_id}.parquet"))
+                stations_saved += 1
+                total_records += len(df)
+                min_ts = df["timestamp"].min() if min_ts is None else min(min_ts, df["timestamp"].min())
+                max_ts = df["timestamp"].max() if max_ts is None else max(max_ts, df["timestamp"].max())
+                print(f"[{i+1}/{len(stations)}] {name}: ✅ {len(df)} hours")
+            else:
+                print(f"[{i+1}/{len(stations)}] {name}: ⏭️ skipped")
+    
+    if stations_saved:
+        legacy_csv = os.path.join(script_dir, "data", "cleaned", "wind_stations.csv")
+        publish_store(staging_dir, output_dir, seed_csv=legacy_csv)
         print("=" * 50)
-        print(f"✅ Saved {len(combined)} records to wind_stations.csv")
-        print(f"   Stations: {combined['station_id'].nunique()}")
-        print(f"   Date range: {combined['timestamp'].min()} to {combined['timestamp'].max()}")
+        print(f"✅ Saved {total_records} records to wind_stations/")
+        print(f"   Stations: {stations_saved}")
+        print(f"   Date range: {min_ts} to {max_ts}")
+    else:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        print("❌ No data fetched - existing wind data left untouched")
+
+
+def write_station(df, path):
+    """Write one station's hourly frame to the Parquet store."""
+    # Values are already float32; dictionary encoding buys nothing for
+    # continuous measurements, so store them plain + zstd
+    df.to_parquet(path, engine="pyarrow", compression="zstd",
+                  use_dictionary=False, index=False)
+
+
+def seed_from_csv(staging_dir, csv_path):
+    """
+    Write a store file for every station in the legacy CSV that has none yet.
+    
+    DataEngine reads only the Parquet store once it exists, so without this a
+    station that failed on the first Parquet run would lose its wind data.
+    Returns the number of stations seeded.
+    """
+    have = {name[:-len(".parquet")] for name in os.listdir(staging_dir) if name.endswith(".parquet")}
+    columns = ["timestamp", "station_id", *HOURLY_VARS.values()]
+    dtypes = {"station_id": "int32", **{column: "float32" for column in HOURLY_VARS.values()}}
+    legacy = pd.read_csv(csv_path, usecols=columns, dtype=dtypes)
+    legacy = legacy[~legacy["station_id"].astype(str).isin(have)]
+    if legacy.empty:
+        return 0
+    legacy["timestamp"] = pd.to_datetime(legacy["timestamp"], format="%Y-%m-%d %H:%M:%S")
+    for station_id, df in legacy.groupby("station_id", sort=False):
+        write_station(df[columns].reset_index(drop=True),
+                      os.path.join(staging_dir, f"{station_id}.parquet"))
+    return legacy["station_id"].nunique()
+
+
+def publish_store(staging_dir, output_dir, seed_csv=None):
+    """
+    Swap a completed staging directory in as the live station store.
+    
+    Stations that failed this run keep their file from the previous store,
+    and any station still missing is filled from `seed_csv` (the legacy
+    wind_stations.csv) when given, so a run with some failed requests never
+    loses coverage.
+    """
+    if os.path.isdir(output_dir):
+        fetched = set(os.listdir(staging_dir))
+        for filename in os.listdir(output_dir):
+            if filename.endswith(".parquet") and filename not in fetched:
+                os.replace(os.path.join(output_dir, filename),
+                           os.path.join(staging_dir, filename))
+    if seed_csv and os.path.exists(seed_csv):
+        seeded = seed_from_csv(staging_dir, seed_csv)
+        if seeded:
+            print(f"   Kept {seeded} stations from {os.path.basename(seed_csv)}")
+    
+    if os.path.isdir(output_dir):
+        old_dir = output_dir + ".old"
+        shutil.rmtree(old_dir, ignore_errors=True)
+        os.replace(output_dir, old_dir)
+        os.replace(staging_dir, output_dir)
+        shutil.rmtree(old_dir)
     else:
-        print("❌ No data fetched")
+        os.replace(staging_dir, output_dir)
 
 
 if __name__ == "__main__":
@@ -8,9 +8,12 @@ Usage: python3 update_fires.py
 
 import os
 import sys
+import numpy as np
 import pandas as pd
 import requests
-import io
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
 # Configuration
@@ -27,6 +30,66 @@ AREA_COORDS = "70,25,85,35"  # Note: FIRMS uses West,South,East,North format for
 SOURCES = ["VIIRS_SNPP_NRT", "VIIRS_NOAA20_NRT"]
 DAYS = 7  # Fetch last 7 days to ensure coverage even if script isn't run daily
 
+# Shared session: pooled keep-alive connections to FIRMS for all sources
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504]),
+))
+
+def fetch_source(source):
+    """
+    Fetch one FIRMS source.
+    
+    Returns (DataFrame or None, log lines). Lines are returned rather than
+    printed so concurrent fetches don't interleave their output.
+    """
+    url = f"https://firms.modaps.eosdis.nasa.gov/api/area/csv/{MAP_KEY}/{source}/{AREA_COORDS}/{DAYS}"
+    log = []
+    
+    try:
+        with SESSION.get(url, timeout=60, stream=True) as response:
+            if response.status_code != 200:
+                log.append(f"   ❌ Error {response.status_code}: {response.text}")
+                return None, log
+            
+            # Parse CSV straight off the socket instead of buffering and
+            # decoding the whole body into a string first
+            response.raw.decode_content = True
+            try:
+                df = pd.read_csv(response.raw)
+            except pd.errors.EmptyDataError:
+                log.append("   ⚠️ Empty response")
+                return None, log
+        
+        log.append(f"   ✅ Received {len(df)} fire records")
+        
+        if len(df) == 0:
+            return None, log
+        
+        # Standardize columns
+        # VIIRS columns: latitude,longitude,brightness,scan,track,acq_date,acq_time,satellite,instrument,confidence,version,bright_t31,frp,daynight
+        
+        # We need to match fires_combined.csv structure:
+        # latitude,longitude,acq_date,acq_time,satellite,instrument,confidence,version,bright_t31,frp,daynight,timestamp
+        
+        # Ensure timestamp column exists
+        # acq_time is typically HHMM (int) or string. Need to convert.
+        
+        # Build all timestamps in one vectorized parse rather than a per-row apply
+        df['timestamp'] = pd.to_datetime(
+            df['acq_date'].astype(str) + ' ' + df['acq_time'].astype(str).str.zfill(4),
+            format="%Y-%m-%d %H%M",
+            cache=True
+        )
+        return df, log
+        
+    except Exception as e:
+        log.append(f"   ❌ Exception: {e}")
+        return None, log
+
+
 def fetch_fires():
     print("=" * 60)
     print("NASA FIRMS Fire Data Updater")
@@ -35,46 +98,18 @@ def fetch_fires():
     
     new_fires = []
     
-    for source in SOURCES:
-        url = f"https://firms.modaps.eosdis.nasa.gov/api/area/csv/{MAP_KEY}/{source}/{AREA_COORDS}/{DAYS}"
-        print(f"\n📡 Fetching {source}...")
-        
-        try:
-            response = requests.get(url, timeout=60)
-            
-            if response.status_code != 200:
-                print(f"   ❌ Error {response.status_code}: {response.text}")
-                continue
-                
-            # Parse CSV
-            csv_content = response.text
-            if not csv_content.strip():
-                print("   ⚠️ Empty response")
-                continue
-                
-            df = pd.read_csv(io.StringIO(csv_content))
-            print(f"   ✅ Received {len(df)} fire records")
-            
-            if len(df) > 0:
-                # Standardize columns
-                # VIIRS columns: latitude,longitude,brightness,scan,track,acq_date,acq_time,satellite,instrument,confidence,version,bright_t31,frp,daynight
-                
-                # We need to match fires_combined.csv structure:
-                # latitude,longitude,acq_date,acq_time,satellite,instrument,confidence,version,bright_t31,frp,daynight,timestamp
-                
-                # Ensure timestamp column exists
-                # acq_time is typically HHMM (int) or string. Need to convert.
-                
-                def parse_time(row):
-                    date_str = str(row['acq_date'])
-                    time_str = str(row['acq_time']).zfill(4)
-                    return pd.to_datetime(f"{date_str} {time_str}", format="%Y-%m-%d %H%M")
-                
-                df['timestamp'] = df.apply(parse_time, axis=1)
-                new_fires.append(df)
-                
-        except Exception as e:
-            print(f"   ❌ Exception: {e}")
+    # Sources are independent requests, so fetch them concurrently over the
+    # shared session; results come back in SOURCES order
+    print(f"\n📡 Fetching {', '.join(SOURCES)}...")
+    with ThreadPoolExecutor(max_workers=len(SOURCES)) as pool:
+        results = list(pool.map(fetch_source, SOURCES))
+    
+    for source, (df, log) in zip(SOURCES, results):
+        print(f"\n📡 {source}")
+        for line in log:
+            print(line)
+        if df is not None:
+            new_fires.append(df)
     
     if not new_fires:
         print("\n⚠️ No new fire data fetched.")
@@ -88,31 +123,44 @@ def fetch_fires():
     if os.path.exists(FIRES_PATH):
         print(f"📂 Loading existing fires from {FIRES_PATH}...")
         existing_df = pd.read_csv(FIRES_PATH)
-        existing_df['timestamp'] = pd.to_datetime(existing_df['timestamp'])
+        existing_df['timestamp'] = pd.to_datetime(existing_df['timestamp'], format="%Y-%m-%d %H:%M:%S", cache=True)
         
-        # Combine and remove duplicates
+        # Remove duplicates
         # Duplicate definition: same lat, lon, timestamp (within small tolerance?)
         # For now, exact match on lat/lon/timestamp
+        #
+        # Anti-join: only hash the new fires' keys against the existing ones and
+        # append the misses, instead of concatenating everything and
+        # re-deduplicating the whole history
+        key_cols = ['latitude', 'longitude', 'timestamp']
+        new_df = new_df.drop_duplicates(subset=key_cols)
+        existing_keys = pd.MultiIndex.from_frame(existing_df[key_cols])
+        is_new = ~pd.MultiIndex.from_frame(new_df[key_cols]).isin(existing_keys)
+        to_add = new_df[is_new].sort_values('timestamp', kind='stable')
         
-        combined_df = pd.concat([existing_df, new_df], ignore_index=True)
-        
-        # Drop duplicates
-        before_dedup = len(combined_df)
-        combined_df = combined_df.drop_duplicates(subset=['latitude', 'longitude', 'timestamp'])
+        combined_df = pd.concat([existing_df, to_add], ignore_index=True)
+        if existing_df['timestamp'].is_monotonic_increasing:
+            # History is already in timestamp order (it is saved sorted), so
+            # splice the sorted new rows in at their searchsorted positions
+            # rather than re-sorting everything: existing row i gets key 2i+1,
+            # a new row landing before existing row p gets key 2p
+            pos = existing_df['timestamp'].searchsorted(to_add['timestamp'], side='right')
+            keys = np.concatenate([2 * np.arange(len(existing_df)) + 1, 2 * pos])
+            combined_df = combined_df.iloc[np.argsort(keys, kind='stable')].reset_index(drop=True)
+        else:
+            combined_df = combined_df.sort_values('timestamp')
         after_dedup = len(combined_df)
         
-        added_count = after_dedup - len(existing_df)
+        added_count = len(to_add)
         print(f"   Existing: {len(existing_df)}")
         print(f"   After update: {after_dedup}")
         print(f"   ✅ Added {added_count} new unique fires")
         
     else:
-        combined_df = new_df
+        # Sort by timestamp
+        combined_df = new_df.sort_values('timestamp')
         print(f"   Created new fire database with {len(combined_df)} records")
     
-    # Sort by timestamp
-    combined_df = combined_df.sort_values('timestamp')
-    
     # Save
     combined_df.to_csv(FIRES_PATH, index=False)
     print(f"💾 Saved to {FIRES_PATH}")
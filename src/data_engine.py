@@ -11,8 +11,34 @@ This module provides the DataEngine class that loads and manages:
 The actual attribution calculations are done in modulation_engine.py.
 """
 
+import numpy as np
 import pandas as pd
 import os
+from functools import lru_cache
+
+# Format used by every timestamp column in data/cleaned; passing it explicitly
+# keeps pandas on its fast parser instead of per-value format inference
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Station wind measurements fit comfortably in float32 - half the memory of
+# the float64 pandas would infer, matching the Parquet store's dtypes
+STATION_WIND_DTYPES = {
+    'station_id': 'int32',
+    'wind_temp': 'float32',
+    'wind_speed_10m': 'float32',
+    'wind_dir_10m': 'float32',
+    'wind_speed_80m': 'float32',
+    'wind_dir_80m': 'float32',
+    'blh': 'float32',
+}
+
+
+def has_parquet_files(directory):
+    """True if `directory` holds at least one (non-hidden) .parquet file."""
+    if not os.path.isdir(directory):
+        return False
+    return any(name.endswith('.parquet') and not name.startswith('.')
+               for name in os.listdir(directory))
 
 
 class DataEngine:
@@ -32,30 +58,76 @@ class DataEngine:
         print("Loading data for Data Engine...")
         self.industries = pd.read_csv(industries_path)
         self.fires = pd.read_csv(fires_path)
-        self.fires['acq_date'] = pd.to_datetime(self.fires['acq_date'])
+        self.fires['acq_date'] = pd.to_datetime(self.fires['acq_date'], format='%Y-%m-%d', cache=True)
+        # Parse fire timestamps once here rather than on every get_fires call
+        if 'timestamp' in self.fires.columns:
+            self.fires['timestamp'] = pd.to_datetime(self.fires['timestamp'], format=TIMESTAMP_FORMAT, cache=True)
         self.stations = pd.read_csv(stations_path)
         
+        # Normalized station name -> row position, built once for exact lookups
+        self._station_names = self.stations['station_name'].astype(str).str.lower()
+        self._station_index = {}
+        for i, station_name in enumerate(self._station_names):
+            self._station_index.setdefault(station_name, i)
+        # Partial-name matches are memoized per query (bounded)
+        self._match_station = lru_cache(maxsize=1024)(self._match_station_uncached)
+        
         # Load regional wind data
         self.wind = pd.read_csv(wind_path)
-        self.wind['timestamp'] = pd.to_datetime(self.wind['timestamp'])
+        self.wind['timestamp'] = pd.to_datetime(self.wind['timestamp'], format=TIMESTAMP_FORMAT, cache=True)
         
         # Try to load station-specific wind data
         self.station_wind = None
         station_wind_path = wind_path.replace('wind_filtered.csv', 'wind_stations.csv')
+        station_wind_dir = wind_path.replace('wind_filtered.csv', 'wind_stations')
         try:
-            if os.path.exists(station_wind_path):
-                self.station_wind = pd.read_csv(station_wind_path)
-                self.station_wind['timestamp'] = pd.to_datetime(self.station_wind['timestamp'])
-                print(f"Loaded station wind data: {len(self.station_wind)} records for {self.station_wind['station_id'].nunique()} stations")
+            if has_parquet_files(station_wind_dir):
+                # Parquet store (one file per station) - timestamps are stored natively
+                self.station_wind = pd.read_parquet(station_wind_dir, engine='pyarrow')
+            elif os.path.exists(station_wind_path):
+                self.station_wind = pd.read_csv(station_wind_path, dtype=STATION_WIND_DTYPES)
+                self.station_wind['timestamp'] = pd.to_datetime(self.station_wind['timestamp'], format=TIMESTAMP_FORMAT, cache=True)
+            if self.station_wind is not None:
+                self._index_station_wind()
+                print(f"Loaded station wind data: {len(self.station_wind)} records for {len(self._station_wind_ranges)} stations")
         except Exception as e:
+            self.station_wind = None
             print(f"Note: Station wind data not loaded: {e}")
         
         print(f"Loaded: {len(self.stations)} stations, {len(self.industries)} industries, {len(self.fires)} fires")
     
+    def _index_station_wind(self):
+        """
+        Sort station wind by (station_id, timestamp) and record each station's
+        row range, so hourly lookups are a binary search instead of a mask
+        over every record.
+        """
+        self.station_wind = self.station_wind.sort_values(
+            ['station_id', 'timestamp'], kind='stable'
+        ).reset_index(drop=True)
+        self._station_wind_ts = self.station_wind['timestamp'].to_numpy()
+        self._station_wind_ranges = {}
+        
+        ids = self.station_wind['station_id'].to_numpy()
+        if len(ids) == 0:
+            return
+        starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+        ends = np.r_[starts[1:], len(ids)]
+        for start, end in zip(starts, ends):
+            self._station_wind_ranges[int(ids[start])] = (start, end)
+    
     def get_station(self, name: str):
-        """Get station by name (partial match)."""
-        matches = self.stations[self.stations['station_name'].str.contains(name, case=False, na=False)]
-        return matches.iloc[0] if len(matches) > 0 else None
+        """Get station by name (exact match first, then partial match)."""
+        key = name.lower()
+        idx = self._station_index.get(key)
+        if idx is None:
+            idx = self._match_station(key)
+        return self.stations.iloc[idx] if idx is not None else None
+    
+    def _match_station_uncached(self, key: str):
+        """Row position of the first station whose name contains key, or None."""
+        matches = np.flatnonzero(self._station_names.str.contains(key, regex=False).to_numpy())
+        return int(matches[0]) if len(matches) > 0 else None
     
     def get_wind(self, timestamp, lat, lon, station_id=None):
         """Get wind data - prioritizes station-specific data, fallback to regional."""
@@ -63,12 +135,13 @@ class DataEngine:
         
         # Try station-specific wind data first
         if self.station_wind is not None and station_id is not None:
-            station_wind = self.station_wind[
-                (self.station_wind['timestamp'] == hour) & 
-                (self.station_wind['station_id'] == station_id)
-            ]
-            if len(station_wind) > 0:
-                return station_wind.iloc[0]
+            bounds = self._station_wind_ranges.get(int(station_id))
+            if bounds is not None:
+                start, end = bounds
+                target = pd.Timestamp(hour).to_datetime64()
+                pos = start + np.searchsorted(self._station_wind_ts[start:end], target)
+                if pos < end and self._station_wind_ts[pos] == target:
+                    return self.station_wind.iloc[pos]
         
         # Fallback to regional wind data
         wind_hour = self.wind[self.wind['timestamp'] == hour]
@@ -88,7 +161,7 @@ class DataEngine:
         
         # Use timestamp column if available, otherwise fall back to date
         if 'timestamp' in self.fires.columns:
-            fires_ts = pd.to_datetime(self.fires['timestamp'])
+            fires_ts = self.fires['timestamp']
             return self.fires[(fires_ts >= start_time) & (fires_ts <= end_time)]
         else:
             # Fallback: get fires from that day and previous day
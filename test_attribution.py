@@ -0,0 +1,28 @@
+"""
+pytest entry point for the real-data attribution suite
+=======================================================
+Runs each case in test_comprehensive_attribution.py as its own test against
+the local API, so pytest reports, selects (-k) and times cases individually.
+With pytest-xdist installed, `pytest test_attribution.py -n auto` spreads the
+cases across workers.
+
+The whole module is skipped when the API server isn't running. The original
+`python test_comprehensive_attribution.py` harness still works unchanged.
+"""
+
+import pytest
+import requests
+
+from test_comprehensive_attribution import API_URL, TEST_CASES, fetch_result, validate_result
+
+
+try:
+    # Any response at all means the server is up
+    requests.get(API_URL.split('/attribution')[0] + '/', timeout=2)
+except (requests.Timeout, requests.ConnectionError):
+    pytest.skip(f"attribution API not reachable at {API_URL}", allow_module_level=True)
+
+
+@pytest.mark.parametrize('case', TEST_CASES, ids=[tc['name'] for tc in TEST_CASES])
+def test_attribution(case):
+    assert validate_result(case, fetch_result(case))
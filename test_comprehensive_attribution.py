@@ -14,428 +14,465 @@ Data sources verified from dates: Feb 2025 - Dec 2025
 import sys
 import os
 import json
+import argparse
+import hashlib
+import re
+import orjson
 import requests
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime
+from operator import itemgetter
+from pathlib import Path
+from types import MappingProxyType
 
-# API endpoint
+# API endpoints
 API_URL = "http://localhost:5000/attribution/modulated"
+BATCH_API_URL = API_URL + "/batch"
+
+# Concurrent single-case requests when the batch endpoint is unavailable
+MAX_WORKERS = 12
+
+# Keep-alive connections reused for every request in the run (one per worker)
+SESSION = requests.Session()
+SESSION.headers['Content-Type'] = 'application/json'
+_adapter = HTTPAdapter(pool_connections=1, pool_maxsize=MAX_WORKERS,
+                       max_retries=Retry(total=2, backoff_factor=0.1))
+SESSION.mount('http://', _adapter)
+SESSION.mount('https://', _adapter)
+
+# Cases that passed last run are skipped while neither they nor the server
+# have changed. Delete the file or pass --no-cache to run everything.
+ROOT_DIR = Path(__file__).resolve().parent
+CACHE_PATH = ROOT_DIR / '.test_cache.json'
+
+
+def _source_fingerprint():
+    """Hash of the local app/engine source, standing in for a server version."""
+    digest = hashlib.blake2b(digest_size=16)
+    for path in [ROOT_DIR / 'app' / 'app.py', *sorted((ROOT_DIR / 'src').glob('*.py'))]:
+        if path.exists():
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+# Set SERVER_VERSION explicitly when testing a server not built from this tree
+SERVER_VERSION = os.environ.get('SERVER_VERSION') or _source_fingerprint()
+
+# Plain ASCII result markers when stdout isn't a terminal (CI logs, pipes):
+# smaller logs and greppable output. Decided once at import.
+ASCII = not sys.stdout.isatty()
+UP = '^' if ASCII else '⬆️'
+DOWN = 'v' if ASCII else '⬇️'
+FLAT = '-' if ASCII else '➡️'
+HIGH = 'H' if ASCII else '🔴'
+MED = 'M' if ASCII else '🟡'
+LOW = 'L' if ASCII else '🟢'
+OK = '[OK]' if ASCII else '✓'
+FAIL = '[X]' if ASCII else '✗'
+TIMES = 'x' if ASCII else '×'
+ARROW = '->' if ASCII else '→'
+DEG = ' deg' if ASCII else '°'
+PASS_LABEL = 'PASS' if ASCII else '✅ PASS'
+FAIL_LABEL = 'FAIL' if ASCII else '❌ FAIL'
+SKIP_LABEL = 'SKIP' if ASCII else '⏭️ SKIP'
+
+# Free text (case descriptions, API explanations, the banner) goes through
+# plain(): box drawing and units are spelled out in ASCII, other symbols dropped
+_ASCII_TEXT = str.maketrans({
+    '╔': '+', '╗': '+', '╚': '+', '╝': '+', '═': '=', '║': '|',
+    '°': ' deg', 'µ': 'u', '³': '3', '→': '->', '×': 'x',
+})
+_NON_ASCII = re.compile(r'[^\x00-\x7f]+ ?')
+
+
+def plain(text):
+    """`text` unchanged on a terminal, ASCII-only otherwise."""
+    if not ASCII:
+        return text
+    return _NON_ASCII.sub('', text.translate(_ASCII_TEXT))
+
+
+def icon(emoji):
+    """Heading icon plus a space on a terminal, nothing otherwise."""
+    return '' if ASCII else emoji + ' '
+
+
+BANNER = plain("""
+╔══════════════════════════════════════════════════════════════════════╗
+║     DELHI POLLUTION ATTRIBUTION - REAL DATA VALIDATION SUITE         ║
+║                                                                       ║
+║  12 Test Cases using ACTUAL station readings, wind data, and fires   ║
+║  Data source: Anand Vihar (DPCC) + ERA5 + VIIRS (Feb-Dec 2025)       ║
+╚══════════════════════════════════════════════════════════════════════╝
+    """)
+
+# FAIL_FAST=1 stops a case at its first failed expectation and the suite at
+# its first failed case (like pytest -x), for quicker feedback in CI
+FAIL_FAST = os.environ.get('FAIL_FAST') == '1'
+
+# QUIET=1 skips the suite banner, the per-source results tables and passing
+# cases' reports; failing cases and the summary still print
+QUIET = os.environ.get('QUIET') == '1'
+
+# Validation thresholds: an expected-HIGH source must be at one of these
+# levels or at least HIGH_PCT_THRESHOLD %; an expected-LOW source must be at
+# most LOW_PCT_THRESHOLD %
+HIGH_LEVELS = frozenset({'High', 'Medium'})
+HIGH_PCT_THRESHOLD = 15
+LOW_PCT_THRESHOLD = 12
 
 # =============================================================================
 # REAL TEST CASES - All data from actual station readings + wind + fires
+# Case data lives in test_cases.json; provenance notes in test_cases.md
 # =============================================================================
 
-TEST_CASES = [
-    # =========================================================================
-    # TEST 1: FEB - Cold Winter Morning (REAL: Feb 27, 2025 9 AM)
-    # Station: Anand Vihar, Wind: Delhi
-    # =========================================================================
-    {
-        'name': '1. Feb Cold Winter Morning Rush',
-        'description': 'REAL DATA: Feb 27, 2025 9 AM - Winter morning, low BLH (105m). '
-                      'Expect: HIGH secondary aerosols due to severe trapping.',
-        'timestamp': '2025-02-27T09:00:00',
-        'readings': {
-            'PM25': 240,    # REAL from station
-            'PM10': 380,    # Estimated (typical ratio)
-            'NO2': 78,      # REAL from station
-            'SO2': 15,      # Estimated
-            'CO': 2.16      # REAL from station
-        },
-        'wind_dir': 30,     # REAL from ERA5
-        'wind_speed': 7.9,  # REAL from ERA5
-        'blh': 105,         # REAL from ERA5 - VERY LOW!
-        'fire_count': 1,    # REAL fire count
-        'expected_high': ['secondary_aerosols'],  # BLH=105m = extreme trapping
-        'expected_low': ['stubble_burning']  # Wrong wind direction (30° = NE)
-    },
-    
-    # =========================================================================
-    # TEST 2: MAR - Pre-Monsoon (REAL: Mar 9, 2025 2 PM)
-    # =========================================================================
-    {
-        'name': '2. Mar Pre-Monsoon Afternoon',
-        'description': 'REAL DATA: Mar 9, 2025 2 PM - Good BLH (2100m), East wind. '
-                      'Expect: Balanced sources, good dispersion.',
-        'timestamp': '2025-03-09T14:00:00',
-        'readings': {
-            'PM25': 155,    # REAL from station
-            'PM10': 280,    # Estimated
-            'NO2': 35,      # REAL from station
-            'SO2': 12,
-            'CO': 1.11      # REAL from station
-        },
-        'wind_dir': 98,     # REAL - East wind
-        'wind_speed': 5.1,  # REAL
-        'blh': 2100,        # REAL - Good mixing
-        'fire_count': 31,   # REAL
-        'expected_high': [],  # Good mixing = no dominant source
-        'expected_low': ['stubble_burning']  # Wrong season
-    },
-    
-    # =========================================================================
-    # TEST 3: MAY - Summer Afternoon (REAL: May 16, 2025 4 PM)
-    # Note: High fire count is agricultural fires, not stubble (wrong season)
-    # =========================================================================
-    {
-        'name': '3. May Summer Afternoon',
-        'description': 'REAL DATA: May 16, 2025 4 PM - Very high BLH (5110m), NW wind. '
-                      'Excellent dispersion despite agricultural fires.',
-        'timestamp': '2025-05-16T16:00:00',
-        'readings': {
-            'PM25': 100,    # REAL from station
-            'PM10': 200,    # Estimated (dust season)
-            'NO2': 84,      # REAL from station
-            'SO2': 12,
-            'CO': 1.32      # REAL from station
-        },
-        'wind_dir': 298,    # REAL - NW wind
-        'wind_speed': 6.9,  # REAL
-        'blh': 5110,        # REAL - EXCELLENT mixing
-        'fire_count': 2189, # REAL - Agricultural fires (not stubble!)
-        'expected_high': [],  # Very high BLH = nothing dominant
-        'expected_low': ['stubble_burning']  # May = not stubble season
-    },
-    
-    # =========================================================================
-    # TEST 4: AUG - Monsoon Morning (REAL: Aug 22, 2025 8 AM)
-    # =========================================================================
-    {
-        'name': '4. Aug Monsoon Morning',
-        'description': 'REAL DATA: Aug 22, 2025 8 AM - Monsoon period, East wind. '
-                      'Good mixing, rain washout.',
-        'timestamp': '2025-08-22T08:00:00',
-        'readings': {
-            'PM25': 177,    # REAL from station
-            'PM10': 280,
-            'NO2': 30,      # REAL - Low
-            'SO2': 10,
-            'CO': 1.89      # REAL from station
-        },
-        'wind_dir': 96,     # REAL - East wind
-        'wind_speed': 3.6,  # REAL
-        'blh': 815,         # REAL - Moderate mixing
-        'fire_count': 2,    # REAL - Almost no fires
-        'expected_high': [],
-        'expected_low': ['stubble_burning']  # No fires, wrong season
-    },
-    
-    # =========================================================================
-    # TEST 5: SEP - Post-Monsoon Night (REAL: Sep 14, 2025 1 AM)
-    # =========================================================================
-    {
-        'name': '5. Sep Post-Monsoon Night',
-        'description': 'REAL DATA: Sep 14, 2025 1 AM - Post-monsoon, moderate trapping. '
-                      'Weather stabilizing, pollution starting to build.',
-        'timestamp': '2025-09-14T01:00:00',
-        'readings': {
-            'PM25': 193,    # REAL from station
-            'PM10': 310,
-            'NO2': 48,      # REAL from station
-            'SO2': 14,
-            'CO': 2.45      # REAL from station
-        },
-        'wind_dir': 180,    # REAL - South wind
-        'wind_speed': 2.2,  # REAL
-        'blh': 340,         # REAL - Moderate
-        'fire_count': 12,   # REAL
-        'expected_high': ['secondary_aerosols'],  # Low BLH at night
-        'expected_low': ['stubble_burning']  # Wrong season
-    },
-    
-    # =========================================================================
-    # TEST 6: OCT - Early Stubble Season (REAL: Oct 19, 2025 6 AM)
-    # =========================================================================
-    {
-        'name': '6. Oct Early Stubble Season',
-        'description': 'REAL DATA: Oct 19, 2025 6 AM - Stubble season starting. '
-                      '222 fires, SW wind (partially from Punjab), very low BLH.',
-        'timestamp': '2025-10-19T06:00:00',
-        'readings': {
-            'PM25': 373,    # REAL from station
-            'PM10': 480,
-            'NO2': 34,      # REAL from station
-            'SO2': 15,
-            'CO': 2.86      # REAL from station
-        },
-        'wind_dir': 230,    # REAL - SW wind
-        'wind_speed': 2.8,  # REAL
-        'blh': 100,         # REAL - VERY LOW
-        'fire_count': 222,  # REAL fire count
-        'expected_high': ['secondary_aerosols'],  # BLH=100m = severe trapping
-        'expected_low': []  # SW wind = partial stubble
-    },
-    
-    # =========================================================================
-    # TEST 7: OCT - DIWALI PEAK (REAL: Oct 21, 2025 2 AM)
-    # This is the actual peak fireworks reading!
-    # =========================================================================
-    {
-        'name': '7. Oct Diwali Night PEAK',
-        'description': 'REAL DATA: Oct 21, 2025 2 AM - DIWALI PEAK! PM2.5=1440 µg/m³! '
-                      'Extreme fireworks pollution with 247 fires and low BLH.',
-        'timestamp': '2025-10-21T02:00:00',
-        'readings': {
-            'PM25': 1440,   # REAL from station - EXTREME!
-            'PM10': 1600,   # Estimated
-            'NO2': 75,      # REAL from station
-            'SO2': 22,
-            'CO': 2.57      # REAL from station
-        },
-        'wind_dir': 270,    # REAL - West wind (NW sector edge)
-        'wind_speed': 2.2,  # REAL
-        'blh': 295,         # REAL - Low
-        'fire_count': 247,  # REAL fire count
-        'expected_high': ['secondary_aerosols'],  # Trapping dominates; local_combustion shows 🎆 but can't exceed ~12% due to 4% prior
-        'expected_low': ['dust']
-    },
-    
-    # =========================================================================
-    # TEST 8: NOV - Peak Stubble Burning (REAL: Nov 8, 2025 10 AM)
-    # =========================================================================
-    {
-        'name': '8. Nov Peak Stubble Morning',
-        'description': 'REAL DATA: Nov 8, 2025 10 AM - Peak stubble burning! '
-                      '356 fires, NW wind (283°), PM2.5=546 µg/m³.',
-        'timestamp': '2025-11-08T10:00:00',
-        'readings': {
-            'PM25': 546,    # REAL from station
-            'PM10': 680,
-            'NO2': 127,     # REAL from station - High traffic
-            'SO2': 18,
-            'CO': 4.36      # REAL from station - High!
-        },
-        'wind_dir': 283,    # REAL - NW wind from Punjab!
-        'wind_speed': 6.3,  # REAL
-        'blh': 595,         # REAL - Moderate
-        'fire_count': 356,  # REAL - PEAK fires!
-        'expected_high': ['stubble_burning', 'traffic'],  # Both high
-        'expected_low': []
-    },
-    
-    # =========================================================================
-    # TEST 9: NOV - Wedding Season Night (REAL: Nov 1, 2025 9 PM)
-    # =========================================================================
-    {
-        'name': '9. Nov Wedding Season Night',
-        'description': 'REAL DATA: Nov 1, 2025 9 PM - Wedding season celebrations. '
-                      'High CO=6.16, low BLH=225m, PM2.5=448.',
-        'timestamp': '2025-11-01T21:00:00',
-        'readings': {
-            'PM25': 448,    # REAL from station
-            'PM10': 560,
-            'NO2': 140,     # REAL from station
-            'SO2': 18,
-            'CO': 6.16      # REAL from station - Very high!
-        },
-        'wind_dir': 240,    # REAL - SW wind
-        'wind_speed': 2.9,  # REAL
-        'blh': 225,         # REAL - Low
-        'fire_count': 288,  # REAL fire count
-        'expected_high': ['secondary_aerosols'],  # Low BLH trapping
-        'expected_low': []
-    },
-    
-    # =========================================================================
-    # TEST 10: DEC - Severe Winter Night (REAL: Dec 2, 2025 12 AM)
-    # =========================================================================
-    {
-        'name': '10. Dec Severe Winter Night Inversion',
-        'description': 'REAL DATA: Dec 2, 2025 12 AM - Severe inversion! '
-                      'BLH=70m (extreme), CO=7.52 (very high), PM2.5=439.',
-        'timestamp': '2025-12-02T00:00:00',
-        'readings': {
-            'PM25': 439,    # REAL from station
-            'PM10': 550,
-            'NO2': 166,     # REAL from station - Very high
-            'SO2': 28,
-            'CO': 7.52      # REAL from station - Extreme!
-        },
-        'wind_dir': 104,    # REAL - East wind
-        'wind_speed': 1.5,  # REAL - Calm
-        'blh': 70,          # REAL - EXTREME INVERSION!
-        'fire_count': 167,  # REAL fire count
-        'expected_high': ['secondary_aerosols'],  # BLH=70m = extreme
-        'expected_low': ['stubble_burning']  # East wind, late season
-    },
-    
-    # =========================================================================
-    # TEST 11: DEC - Industrial Morning (REAL: Dec 2, 2025 10 AM)
-    # =========================================================================
-    {
-        'name': '11. Dec Industrial Morning',
-        'description': 'REAL DATA: Dec 2, 2025 10 AM - High NO2=172 (traffic). '
-                      'Moderate BLH after morning inversion.',
-        'timestamp': '2025-12-02T10:00:00',
-        'readings': {
-            'PM25': 330,    # REAL from station
-            'PM10': 420,
-            'NO2': 172,     # REAL from station - Very high traffic
-            'SO2': 30,      # Elevated for industrial
-            'CO': 3.75      # REAL from station
-        },
-        'wind_dir': 63,     # REAL - NE wind
-        'wind_speed': 0.8,  # REAL - Calm
-        'blh': 410,         # REAL - Moderate
-        'fire_count': 167,  # REAL fire count
-        'expected_high': ['traffic', 'secondary_aerosols'],
-        'expected_low': ['stubble_burning']  # Wrong wind direction
-    },
-    
-    # =========================================================================
-    # TEST 12: NOV - High Fires but EAST Wind (REAL: Nov 5, 2025 1 AM)
-    # This tests that fire count alone doesn't drive stubble attribution
-    # =========================================================================
-    {
-        'name': '12. Nov High Fires but EAST Wind',
-        'description': 'REAL DATA: Nov 5, 2025 1 AM - 316 fires but EAST wind (114°). '
-                      'Fire smoke not reaching Delhi despite high count.',
-        'timestamp': '2025-11-05T01:00:00',
-        'readings': {
-            'PM25': 138,    # REAL from station - Lower despite fires!
-            'PM10': 200,
-            'NO2': 77,      # REAL from station
-            'SO2': 15,
-            'CO': 3.61      # REAL from station
-        },
-        'wind_dir': 114,    # REAL - EAST wind (wrong direction!)
-        'wind_speed': 3.5,  # REAL
-        'blh': 270,         # REAL - Low
-        'fire_count': 316,  # REAL - Many fires BUT wrong wind!
-        'expected_high': ['secondary_aerosols'],
-        'expected_low': ['stubble_burning']  # East wind blocks smoke!
-    }
-]
-
-
-def run_test(test_case):
-    """Run a single test case and validate results."""
-    print(f"\n{'='*70}")
-    print(f"TEST: {test_case['name']}")
-    print(f"{'='*70}")
-    print(f"📋 {test_case['description']}")
-    print(f"\n📊 Inputs (REAL DATA):")
-    print(f"   Timestamp: {test_case['timestamp']}")
-    print(f"   PM2.5: {test_case['readings'].get('PM25')}, PM10: {test_case['readings'].get('PM10')}")
-    print(f"   NO2: {test_case['readings'].get('NO2')}, SO2: {test_case['readings'].get('SO2')}, CO: {test_case['readings'].get('CO')}")
-    print(f"   Wind: {test_case['wind_dir']}° @ {test_case['wind_speed']} m/s")
-    print(f"   BLH: {test_case['blh']}m, Fires: {test_case['fire_count']}")
-    
-    # Make API request
-    payload = {
+TEST_CASES_PATH = ROOT_DIR / 'test_cases.json'
+
+# Readings are frozen so a case's request body can't drift after import
+TEST_CASES = tuple(
+    {**tc, 'readings': MappingProxyType(tc['readings'])}
+    for tc in orjson.loads(TEST_CASES_PATH.read_bytes())
+)
+
+
+def build_payload(test_case):
+    """Request body for /attribution/modulated from a test case."""
+    return {
         'timestamp': test_case['timestamp'],
-        'readings': test_case['readings'],
+        'readings': dict(test_case['readings']),
         'wind_dir': test_case['wind_dir'],
         'wind_speed': test_case['wind_speed'],
         'blh': test_case['blh'],
         'fire_count': test_case['fire_count']
     }
+
+
+def build_header(test_case):
+    """Static input banner printed above a case's results."""
+    readings = test_case['readings']
+    return (
+        f"\n{'='*70}\n"
+        f"TEST: {test_case['name']}\n"
+        f"{'='*70}\n"
+        f"{icon('📋')}{plain(test_case['description'])}\n"
+        f"\n{icon('📊')}Inputs (REAL DATA):\n"
+        f"   Timestamp: {test_case['timestamp']}\n"
+        f"   PM2.5: {readings.get('PM25')}, PM10: {readings.get('PM10')}\n"
+        f"   NO2: {readings.get('NO2')}, SO2: {readings.get('SO2')}, CO: {readings.get('CO')}\n"
+        f"   Wind: {test_case['wind_dir']}{DEG} @ {test_case['wind_speed']} m/s\n"
+        f"   BLH: {test_case['blh']}m, Fires: {test_case['fire_count']}\n"
+    )
+
+
+# Everything derived purely from a case is built once at import:
+# - the request body as bytes; requests send it raw (SESSION already carries
+#   the JSON Content-Type) instead of re-encoding it
+# - the input banner, so reports don't re-format it
+# - the expected HIGH/LOW sources as sets, and their union for --only filtering
+for _test_case in TEST_CASES:
+    _test_case['_payload_bytes'] = orjson.dumps(build_payload(_test_case))
+    _test_case['_header'] = build_header(_test_case)
+    _test_case['_high_set'] = frozenset(_test_case.get('expected_high', ()))
+    _test_case['_low_set'] = frozenset(_test_case.get('expected_low', ()))
+    _test_case['_source_set'] = _test_case['_high_set'] | _test_case['_low_set']
+
+# Inverted indexes: source -> indices (into TEST_CASES) of the cases that
+# expect it HIGH / LOW, for diagnostics like --show-cases-for
+EXPECTED_HIGH_INDEX = defaultdict(list)
+EXPECTED_LOW_INDEX = defaultdict(list)
+for _i, _test_case in enumerate(TEST_CASES):
+    for _source in _test_case['_high_set']:
+        EXPECTED_HIGH_INDEX[_source].append(_i)
+    for _source in _test_case['_low_set']:
+        EXPECTED_LOW_INDEX[_source].append(_i)
+
+
+def find_cases(source, expected='high'):
+    """Test cases that expect `source` to be HIGH ('high') or LOW ('low')."""
+    index = {'high': EXPECTED_HIGH_INDEX, 'low': EXPECTED_LOW_INDEX}[expected]
+    # .get() so unknown sources don't grow the defaultdict
+    return [TEST_CASES[i] for i in index.get(source, ())]
+
+
+def cache_key(test_case):
+    """Fingerprint of a case's request, expectations, thresholds and the server version."""
+    expectations = orjson.dumps([
+        test_case.get('expected_high', []), test_case.get('expected_low', []),
+        sorted(HIGH_LEVELS), HIGH_PCT_THRESHOLD, LOW_PCT_THRESHOLD,
+    ])
+    return hashlib.blake2b(
+        test_case['_payload_bytes'] + expectations + SERVER_VERSION.encode()
+    ).hexdigest()
+
+
+def load_cache():
+    """Last-passing cache keys by case name ({} if there is no usable cache)."""
+    try:
+        return orjson.loads(CACHE_PATH.read_bytes())
+    except (OSError, orjson.JSONDecodeError):
+        return {}
+
+
+def save_cache(cache):
+    CACHE_PATH.write_bytes(orjson.dumps(cache, option=orjson.OPT_INDENT_2))
+
+
+def parse_response(response):
+    """
+    Decode an API response, or describe why it can't be used.
     
+    5xx responses are reported from the status code alone. Anything else is
+    parsed as JSON; the API's own 4xx bodies already carry an 'error' key.
+    """
+    if response.status_code >= 500:
+        return {'error': f"SERVER {response.status_code}"}
     try:
-        response = requests.post(API_URL, json=payload, timeout=10)
-        response.raise_for_status()
-        result = response.json()
-    except Exception as e:
-        print(f"❌ API ERROR: {e}")
-        return False
+        result = orjson.loads(response.content)
+    except orjson.JSONDecodeError:
+        return {'error': f"HTTP {response.status_code}: response is not JSON"}
+    if not isinstance(result, dict):
+        return {'error': f"HTTP {response.status_code}: response is not a JSON object"}
+    return result
+
+
+def fetch_result(test_case):
+    """Run one test case through the single-case endpoint."""
+    try:
+        response = SESSION.post(API_URL, data=test_case['_payload_bytes'], timeout=10)
+    except requests.RequestException as e:
+        # Timeouts, refused connections, broken or undecodable bodies, redirect
+        # loops... all fail this case rather than the whole run
+        return {'error': f"REQUEST {type(e).__name__}: {e}"}
+    return parse_response(response)
+
+
+def fetch_results(test_cases):
+    """
+    Run every test case through the API in a single batch request.
     
-    # Display results
-    print(f"\n📈 RESULTS (Prior → Modulated):")
-    contributions = result.get('contributions', {})
+    Falls back to one request per case, sent concurrently, against servers
+    without the batch endpoint. Returns one result dict per test case, in
+    order. If the request itself fails, every slot gets {'error': ...} so
+    each case reports it.
+    """
+    # Splice the pre-serialized case bodies into the batch body directly
+    body = b'{"cases":[' + b','.join(tc['_payload_bytes'] for tc in test_cases) + b']}'
     
-    # Sort by percentage for display
-    sorted_sources = sorted(
-        contributions.items(),
-        key=lambda x: x[1]['percentage'],
-        reverse=True
-    )
+    try:
+        response = SESSION.post(BATCH_API_URL, data=body, timeout=30)
+    except requests.RequestException as e:
+        return [{'error': f"REQUEST {type(e).__name__}: {e}"} for _ in test_cases]
     
-    for source, data in sorted_sources:
-        pct = data['percentage']
-        prior = data['prior']
-        mod = data['modulation_factor']
-        level = data['level']
-        exp = data.get('explanation', '')
-        
-        # Arrow indicator
-        if mod > 1.1:
-            arrow = "⬆️"
-        elif mod < 0.9:
-            arrow = "⬇️"
-        else:
-            arrow = "➡️"
+    # Older servers lack the batch route; with the dashboard mounted at the
+    # site root, Flask answers such POSTs with 405 rather than 404
+    if response.status_code in (404, 405):
+        # Cases are independent, so overlap their network waits; map()
+        # keeps results in test case order
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+            return list(pool.map(fetch_result, test_cases))
+    
+    batch = parse_response(response)
+    if 'error' in batch:
+        return [{'error': batch['error']} for _ in test_cases]
+    
+    # Callers zip results against their cases, so a short or malformed reply
+    # must fail every case rather than silently drop some
+    results = batch.get('results')
+    if (not isinstance(results, list) or len(results) != len(test_cases)
+            or not all(isinstance(result, dict) for result in results)):
+        error = f"malformed batch response: expected {len(test_cases)} results"
+        return [{'error': error} for _ in test_cases]
+    return results
+
+
+def write_report(out, passed):
+    """Write a case's buffered report lines; QUIET runs only show failures."""
+    if not (QUIET and passed):
+        sys.stdout.write(''.join(out))
+    return passed
+
+
+def validate_result(test_case, result):
+    """Display a single test case's API result and validate it."""
+    # Collect the whole report and write it once, so there's a single
+    # stdout write per test and reports can never interleave
+    out = []
+    p = out.append
+    
+    p(test_case['_header'])
+    
+    if 'error' in result:
+        p(f"{icon('❌')}API ERROR: {result['error']}\n")
+        return write_report(out, False)
+    
+    contributions = result.get('contributions', {})
+    
+    # Display results (skipped under QUIET)
+    if not QUIET:
+        p(f"\n{icon('📈')}RESULTS (Prior {ARROW} Modulated):\n")
         
-        # Level indicator
-        if level == 'High':
-            lvl = "🔴"
-        elif level == 'Medium':
-            lvl = "🟡"
-        else:
-            lvl = "🟢"
+        # Sort by percentage for display - hoist each percentage once and sort on
+        # the C-level itemgetter (stable, so ties keep API order)
+        rows = [(data['percentage'], source, data) for source, data in contributions.items()]
+        rows.sort(key=itemgetter(0), reverse=True)
         
-        print(f"   {lvl} {source:22} {prior:.0f}% {arrow} {pct:5.1f}%  (×{mod:.2f}) - {exp[:50]}")
+        for pct, source, data in rows:
+            prior = data['prior']
+            mod = data['modulation_factor']
+            level = data['level']
+            exp = data.get('explanation', '')
+            
+            # Arrow indicator
+            if mod > 1.1:
+                arrow = UP
+            elif mod < 0.9:
+                arrow = DOWN
+            else:
+                arrow = FLAT
+            
+            # Level indicator
+            if level == 'High':
+                lvl = HIGH
+            elif level == 'Medium':
+                lvl = MED
+            else:
+                lvl = LOW
+            
+            p(f"   {lvl} {source:22} {prior:.0f}% {arrow} {pct:5.1f}%  ({TIMES}{mod:.2f}) - {plain(exp[:50])}\n")
     
     # Validate expectations
-    print(f"\n✅ VALIDATION:")
-    passed = True
+    p(f"\n{icon('✅')}VALIDATION:\n")
+    
+    # Index the API result once, then check expectations by dict lookup
+    pcts = {source: data.get('percentage', 0) for source, data in contributions.items()}
+    levels = {source: data.get('level', '') for source, data in contributions.items()}
     
     # Check expected HIGH sources
-    for expected in test_case.get('expected_high', []):
-        source_data = contributions.get(expected, {})
-        pct = source_data.get('percentage', 0)
-        level = source_data.get('level', '')
+    high_fail = []
+    # Check (and report) in the order the case lists its expectations
+    for expected in test_case['expected_high']:
+        pct = pcts.get(expected, 0)
+        level = levels.get(expected, '')
         
-        if level in ['High', 'Medium'] or pct >= 15:
-            print(f"   ✓ {expected} is elevated ({pct:.1f}%, {level})")
+        if level in HIGH_LEVELS or pct >= HIGH_PCT_THRESHOLD:
+            p(f"   {OK} {expected} is elevated ({pct:.1f}%, {level})\n")
         else:
-            print(f"   ✗ {expected} should be HIGH but is {pct:.1f}% ({level})")
-            passed = False
+            p(f"   {FAIL} {expected} should be HIGH but is {pct:.1f}% ({level})\n")
+            high_fail.append(expected)
+            if FAIL_FAST:
+                return write_report(out, False)
     
     # Check expected LOW sources
-    for expected in test_case.get('expected_low', []):
-        source_data = contributions.get(expected, {})
-        pct = source_data.get('percentage', 0)
+    low_fail = []
+    for expected in test_case['expected_low']:
+        pct = pcts.get(expected, 0)
         
-        if pct <= 12:
-            print(f"   ✓ {expected} is low ({pct:.1f}%)")
+        if pct <= LOW_PCT_THRESHOLD:
+            p(f"   {OK} {expected} is low ({pct:.1f}%)\n")
         else:
-            print(f"   ✗ {expected} should be LOW but is {pct:.1f}%")
-            passed = False
+            p(f"   {FAIL} {expected} should be LOW but is {pct:.1f}%\n")
+            low_fail.append(expected)
+            if FAIL_FAST:
+                return write_report(out, False)
     
-    return passed
+    return write_report(out, not (high_fail or low_fail))
 
 
-def main():
+def main(argv=None):
     """Run all test cases."""
-    print("""
-╔══════════════════════════════════════════════════════════════════════╗
-║     DELHI POLLUTION ATTRIBUTION - REAL DATA VALIDATION SUITE         ║
-║                                                                       ║
-║  12 Test Cases using ACTUAL station readings, wind data, and fires   ║
-║  Data source: Anand Vihar (DPCC) + ERA5 + VIIRS (Feb-Dec 2025)       ║
-╚══════════════════════════════════════════════════════════════════════╝
-    """)
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--no-cache', action='store_true',
+                        help='run every case and leave the pass cache untouched (use in CI)')
+    parser.add_argument('--only', action='append', default=[], metavar='SOURCE',
+                        help='only run cases with an expectation about SOURCE (repeatable)')
+    parser.add_argument('--show-cases-for', metavar='SOURCE',
+                        help='list the cases that expect SOURCE to be HIGH or LOW, then exit')
+    args = parser.parse_args(argv)
+    
+    # A misspelled source would otherwise select nothing and pass vacuously
+    unknown = sorted(set(args.only) - (EXPECTED_HIGH_INDEX.keys() | EXPECTED_LOW_INDEX.keys()))
+    if unknown:
+        parser.error(f"--only: no test case has expectations about {', '.join(unknown)}")
+    
+    if args.show_cases_for:
+        for expected in ('high', 'low'):
+            cases = find_cases(args.show_cases_for, expected)
+            print(f"Expected {expected.upper()} for {args.show_cases_for}: {len(cases)} cases")
+            for tc in cases:
+                print(f"   {tc['name']}")
+        return True
+    
+    if not QUIET:
+        print(BANNER)
     
     results = []
     
-    for test_case in TEST_CASES:
-        passed = run_test(test_case)
-        results.append((test_case['name'], passed))
+    test_cases = TEST_CASES
+    if args.only:
+        test_cases = [tc for tc in TEST_CASES if not tc['_source_set'].isdisjoint(args.only)]
+        print(f"{icon('🔎')}--only {', '.join(args.only)}: {len(test_cases)}/{len(TEST_CASES)} cases")
+    
+    cache = {} if args.no_cache else load_cache()
+    keys = {tc['name']: cache_key(tc) for tc in test_cases}
+    cached = {name for name, key in keys.items() if cache.get(name) == key}
+    to_run = [tc for tc in test_cases if tc['name'] not in cached]
+    
+    # One round trip for the whole suite, then validate each result locally
+    api_results = {}
+    if to_run:
+        api_results = dict(zip((tc['name'] for tc in to_run), fetch_results(to_run)))
     
-    # Summary
-    print(f"\n\n{'='*70}")
-    print("SUMMARY")
-    print(f"{'='*70}")
+    for test_case in test_cases:
+        name = test_case['name']
+        if name in cached:
+            if not QUIET:
+                sys.stdout.write(f"\n{SKIP_LABEL} (cached pass) {name}\n")
+            results.append((name, True))
+            continue
+        
+        # A case that was sent but got no result back is a failure, never a pass
+        result = api_results.get(name, {'error': 'no result returned for this case'})
+        passed = validate_result(test_case, result)
+        results.append((name, passed))
+        if passed:
+            cache[name] = keys[name]
+        else:
+            cache.pop(name, None)
+            if FAIL_FAST:
+                break
+    
+    if not args.no_cache:
+        save_cache(cache)
     
-    passed_count = sum(1 for _, p in results if p)
+    # Summary (buffered, one write)
+    out = []
+    p = out.append
+    p(f"\n\n{'='*70}\n")
+    p("SUMMARY\n")
+    p(f"{'='*70}\n")
+    
+    passed_count = sum(1 for _, ok in results if ok)
     total = len(results)
+    if not total:
+        p("No test cases selected\n")
+        sys.stdout.write(''.join(out))
+        return False
     
     for name, passed in results:
-        status = "✅ PASS" if passed else "❌ FAIL"
-        print(f"   {status} {name}")
+        status = PASS_LABEL if passed else FAIL_LABEL
+        p(f"   {status} {name}\n")
+    
+    not_run = len(test_cases) - total
+    if not_run:
+        p(f"\n{icon('⏹️')}FAIL_FAST: stopped after first failure, {not_run} cases not run\n")
     
-    print(f"\n{'='*70}")
-    print(f"TOTAL: {passed_count}/{total} tests passed ({100*passed_count/total:.0f}%)")
-    print(f"{'='*70}")
+    p(f"\n{'='*70}\n")
+    p(f"TOTAL: {passed_count}/{total} tests passed ({100*passed_count/total:.0f}%)\n")
+    p(f"{'='*70}\n")
+    sys.stdout.write(''.join(out))
     
     return passed_count == total
 
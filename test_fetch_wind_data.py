@@ -0,0 +1,63 @@
+"""
+Tests for publishing the per-station Parquet wind store
+========================================================
+publish_store must never leave a store that covers fewer stations than the
+data it replaces: neither the previous Parquet store nor the legacy CSV.
+"""
+
+import os
+
+import pandas as pd
+
+from fetch_wind_data import HOURLY_VARS, publish_store, write_station
+
+
+def station_frame(station_id, value):
+    """Two hours of wind data for one station, every value set to `value`."""
+    df = pd.DataFrame({
+        "timestamp": pd.to_datetime(["2025-02-18 00:00:00", "2025-02-18 01:00:00"]),
+        "station_id": pd.Series([station_id] * 2, dtype="int32"),
+    })
+    for column in HOURLY_VARS.values():
+        df[column] = pd.Series([value] * 2, dtype="float32")
+    return df
+
+
+def make_store(directory, frames):
+    os.makedirs(directory)
+    for station_id, value in frames.items():
+        write_station(station_frame(station_id, value), os.path.join(directory, f"{station_id}.parquet"))
+
+
+def read_store(directory):
+    """{station_id: blh of the first row} for every station in the store."""
+    df = pd.read_parquet(directory, engine="pyarrow")
+    return df.groupby("station_id")["blh"].first().to_dict()
+
+
+def test_publish_keeps_previous_stations(tmp_path):
+    output_dir = str(tmp_path / "wind_stations")
+    staging_dir = output_dir + ".staging"
+    make_store(output_dir, {235: 1.0, 17: 1.0})
+    make_store(staging_dir, {235: 2.0})
+    
+    publish_store(staging_dir, output_dir)
+    
+    assert read_store(output_dir) == {235: 2.0, 17: 1.0}
+    assert sorted(os.listdir(tmp_path)) == ["wind_stations"]
+
+
+def test_first_publish_seeds_missing_stations_from_csv(tmp_path):
+    output_dir = str(tmp_path / "wind_stations")
+    staging_dir = output_dir + ".staging"
+    make_store(staging_dir, {235: 2.0})
+    csv_path = str(tmp_path / "wind_stations.csv")
+    legacy = pd.concat([station_frame(235, 1.0), station_frame(10484, 3.0)])
+    legacy["station_name"] = "Legacy"
+    legacy.to_csv(csv_path, index=False, date_format="%Y-%m-%d %H:%M:%S")
+    
+    publish_store(staging_dir, output_dir, seed_csv=csv_path)
+    
+    # Freshly fetched data wins; stations only in the CSV are carried over
+    assert read_store(output_dir) == {235: 2.0, 10484: 3.0}
+    assert not os.path.exists(staging_dir)